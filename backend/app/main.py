@@ -1,5 +1,14 @@
+"""Heap Analyzer API application.
+
+Run with uvloop and httptools selected explicitly, so a missing package fails
+at startup instead of silently falling back to asyncio and h11::
+
+    uvicorn app.main:app --loop uvloop --http httptools
+"""
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .routers import analysis
 
@@ -7,6 +16,7 @@ app = FastAPI(
     title="Heap Analyzer API",
     description="Backend API for the Heap Analyzer memory visualization tool",
     version="2.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
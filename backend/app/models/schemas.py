@@ -1,9 +1,10 @@
 from __future__ import annotations
 
 from enum import Enum
-from typing import Optional
+from typing import Annotated, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing_extensions import NotRequired, TypedDict
 
 
 class MemoryAction(str, Enum):
@@ -20,12 +21,27 @@ class BlockStatus(str, Enum):
     double_free = "double_free"
 
 
-class MemoryEvent(BaseModel):
+#: Largest accepted block size (1 TiB).
+MAX_BLOCK_SIZE = 2**40
+
+#: Longest trace whose heap totals are guaranteed to fit in a signed 64-bit
+#: integer, the range the orjson response encoder supports, even when every
+#: event allocates a MAX_BLOCK_SIZE block.
+MAX_SAFE_EVENTS = (2**63 - 1) // MAX_BLOCK_SIZE
+
+
+class MemoryEvent(TypedDict):
+    """A trace event, validated into a plain dict rather than a model.
+
+    Pydantic still checks and coerces every field, but skips building a model
+    instance per event, which dominated request parsing for long traces.
+    """
+
     time: int
     action: MemoryAction
-    id: Optional[str] = None
-    size: Optional[int] = None
-    label: Optional[str] = None
+    id: NotRequired[Optional[str]]
+    size: NotRequired[Optional[Annotated[int, Field(ge=0, le=MAX_BLOCK_SIZE)]]]
+    label: NotRequired[Optional[str]]
 
 
 class MemoryBlock(BaseModel):
@@ -56,6 +72,13 @@ class AnalyzeRequest(BaseModel):
     events: list[MemoryEvent]
     source_code: Optional[str] = None
     language: Optional[str] = None
+    compress_snapshots: bool = False
+
+
+class AnalysisSummary(BaseModel):
+    blocks: list[MemoryBlock]
+    stats: MemoryStats
+    verdict: str
 
 
 class AnalyzeResponse(BaseModel):
@@ -1,15 +1,155 @@
-from fastapi import APIRouter
+import hashlib
+import os
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from threading import Lock
 
-from ..models.schemas import AnalyzeRequest, AnalyzeResponse
-from ..services.analyzer import analyze_events
+import orjson
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+
+from ..models.schemas import (
+    MAX_SAFE_EVENTS,
+    AnalysisSummary,
+    AnalyzeRequest,
+    AnalyzeResponse,
+    HeapSnapshot,
+    MemoryAction,
+)
+from ..services.analyzer import analyze_events, iter_analysis
 
 router = APIRouter(prefix="/api", tags=["analysis"])
 
+# The response cache is bounded by encoded size rather than entry count, since
+# a body at the default MAX_EVENTS runs to 5-17 MB. The per-entry limit admits
+# those bodies, which are the slow (~1s) analyses worth caching, while the
+# total keeps a worker's cache to a handful of them.
+CACHE_MAX_BYTES = 128 * 1024 * 1024
+CACHE_MAX_BODY_BYTES = 32 * 1024 * 1024
+
+# Traces longer than this are rejected before any analysis work is done.
+MAX_EVENTS = min(int(os.getenv("HEAP_MAX_EVENTS", "100000")), MAX_SAFE_EVENTS)
+
+# Snapshot lines are buffered into chunks of this many before being sent.
+STREAM_CHUNK_LINES = 1024
+
+
+class _ResponseCache:
+    """Thread-safe LRU of encoded response bodies, bounded by total bytes."""
+
+    def __init__(self, max_bytes: int, max_body_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.max_body_bytes = max_body_bytes
+        self.size = 0
+        self._entries: OrderedDict[bytes, bytes] = OrderedDict()
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: bytes) -> bytes | None:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: bytes, body: bytes) -> None:
+        if len(body) > self.max_body_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._entries[key] = body
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+# Encoded analysis responses keyed by a digest of the request's events.
+_cache = _ResponseCache(CACHE_MAX_BYTES, CACHE_MAX_BODY_BYTES)
+
+
+def _check_trace_size(request: AnalyzeRequest) -> None:
+    if len(request.events) > MAX_EVENTS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Trace too large: {len(request.events)} events "
+            f"(limit {MAX_EVENTS})",
+        )
+
+
+# Enum members have a slow Python-level repr, so the key uses their values.
+_ACTION_VALUES = {action: action.value for action in MemoryAction}
+
+
+def _cache_key(request: AnalyzeRequest) -> bytes:
+    """Digest the fields that affect the analysis result.
+
+    ``time`` is left out since the analysis never reads it, and the fields are
+    hashed through ``repr`` rather than orjson so arbitrarily large ints cannot
+    make hashing fail.
+    """
+    values = _ACTION_VALUES
+    payload = [
+        (values[e["action"]], e.get("id"), e.get("size"), e.get("label"))
+        for e in request.events
+    ]
+    payload.append(request.compress_snapshots)
+    return hashlib.blake2b(repr(payload).encode(), digest_size=16).digest()
+
+
+@router.post(
+    "/analyze", response_model=AnalyzeResponse, response_class=ORJSONResponse
+)
+def analyze(request: AnalyzeRequest) -> Response:
+    """Analyze a sequence of memory events and return statistics.
+
+    Declared sync so Starlette runs the CPU-bound analysis in its threadpool
+    instead of blocking the event loop. The response is encoded straight
+    with orjson, skipping FastAPI's re-validation against the response model,
+    and encoded bodies of up to ``CACHE_MAX_BODY_BYTES`` are kept in an LRU
+    cache so resubmitted traces are answered without re-running the analysis.
+    """
+    _check_trace_size(request)
+    key = _cache_key(request)
+    body = _cache.get(key)
+    if body is None:
+        body = orjson.dumps(analyze_events(request).model_dump())
+        _cache.put(key, body)
+
+    return Response(content=body, media_type="application/json")
+
+
+def _encode_ndjson(
+    items: Iterable[HeapSnapshot | AnalysisSummary],
+) -> Iterator[bytes]:
+    """Encode snapshots and the trailing summary as newline-delimited JSON."""
+    lines: list[bytes] = []
+    for item in items:
+        kind = "summary" if isinstance(item, AnalysisSummary) else "snapshot"
+        lines.append(orjson.dumps({"type": kind, **item.model_dump()}))
+        if len(lines) >= STREAM_CHUNK_LINES:
+            yield b"\n".join(lines) + b"\n"
+            lines.clear()
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+
+@router.post("/analyze/stream")
+def analyze_stream(request: AnalyzeRequest) -> StreamingResponse:
+    """Stream the analysis as NDJSON: one line per snapshot, then the summary.
 
-@router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze(request: AnalyzeRequest) -> AnalyzeResponse:
-    """Analyze a sequence of memory events and return statistics."""
-    return analyze_events(request)
+    Snapshots are encoded as the replay produces them, so the full snapshot
+    list is never held in memory.
+    """
+    _check_trace_size(request)
+    return StreamingResponse(
+        _encode_ndjson(iter_analysis(request)),
+        media_type="application/x-ndjson",
+    )
 
 
 @router.get("/health")
@@ -1,4 +1,15 @@
-from app.models.schemas import AnalyzeRequest, MemoryEvent
+from collections import Counter
+
+import pytest
+from pydantic import ValidationError
+
+from app.models.schemas import (
+    MAX_BLOCK_SIZE,
+    AnalyzeRequest,
+    BlockStatus,
+    MemoryAction,
+    MemoryEvent,
+)
 from app.services.analyzer import analyze_events
 
 
@@ -28,7 +39,7 @@ def test_leak_detection():
     result = analyze_events(AnalyzeRequest(events=events))
     assert result.stats.leaked_count == 1
     assert result.stats.leaked_bytes == 128
-    assert "LEAK" in result.verdict
+    assert result.verdict == "LEAK: 128B IN 1 BLOCK(S)"
 
 
 def test_double_free_detection():
@@ -69,3 +80,76 @@ def test_snapshots_count():
     ]
     result = analyze_events(AnalyzeRequest(events=events))
     assert len(result.snapshots) == 3
+
+
+def test_snapshots_track_status_changes():
+    """Heap totals should follow reallocs and frees of leaked blocks."""
+    events = [
+        MemoryEvent(time=0, action="alloc", id="a", size=64, label="a"),
+        MemoryEvent(time=1, action="alloc", id="a", size=32, label="a"),
+        MemoryEvent(time=2, action="alloc", id="b", size=16, label="b"),
+        MemoryEvent(time=3, action="end"),
+        MemoryEvent(time=4, action="free", id="b"),
+    ]
+    result = analyze_events(AnalyzeRequest(events=events))
+    assert [s.heap_bytes for s in result.snapshots] == [64, 32, 48, 48, 32]
+    assert [s.leaked_bytes for s in result.snapshots] == [0, 0, 0, 48, 32]
+    assert result.stats.current_heap == 32
+    assert result.stats.leaked_count == 1
+    assert result.stats.freed_count == 1
+
+
+def test_compressed_snapshots():
+    """Compressed snapshots should skip events that leave the heap unchanged."""
+    events = [
+        MemoryEvent(time=0, action="alloc", id="a", size=64, label="a"),
+        MemoryEvent(time=1, action="free", id="missing"),
+        MemoryEvent(time=2, action="free", id="a"),
+        MemoryEvent(time=3, action="free", id="a"),
+        MemoryEvent(time=4, action="end"),
+    ]
+    result = analyze_events(
+        AnalyzeRequest(events=events, compress_snapshots=True)
+    )
+    assert [s.step for s in result.snapshots] == [0, 2, 4]
+    assert result.stats.total_ops == 5
+
+
+def test_events_are_validated():
+    """Events should still be checked and coerced despite staying dicts."""
+    request = AnalyzeRequest(events=[{"time": "0", "action": "alloc", "size": "8"}])
+    assert request.events[0] == {"time": 0, "action": MemoryAction.alloc, "size": 8}
+    with pytest.raises(ValidationError):
+        AnalyzeRequest(events=[{"time": 0, "action": "realloc"}])
+
+
+@pytest.mark.parametrize("size", [-1, MAX_BLOCK_SIZE + 1, 2**62, 2**64])
+def test_out_of_range_sizes_rejected(size):
+    """Block sizes must stay within [0, MAX_BLOCK_SIZE]."""
+    event = {"time": 0, "action": "alloc", "id": "a", "size": size, "label": "a"}
+    with pytest.raises(ValidationError):
+        AnalyzeRequest(events=[event])
+
+
+def test_running_counts_match_block_statuses():
+    """Running per-status counts should agree with the final block statuses."""
+    events = [
+        MemoryEvent(time=0, action="alloc", id="a", size=8, label="a"),
+        MemoryEvent(time=1, action="alloc", id="b", size=16, label="b"),
+        MemoryEvent(time=2, action="alloc", id="c", size=32, label="c"),
+        MemoryEvent(time=3, action="free", id="a"),
+        MemoryEvent(time=4, action="double_free", id="a"),
+        MemoryEvent(time=5, action="alloc", id="a", size=4, label="a"),
+        MemoryEvent(time=6, action="free", id="b"),
+        MemoryEvent(time=7, action="end"),
+        MemoryEvent(time=8, action="alloc", id="d", size=2, label="d"),
+    ]
+    result = analyze_events(AnalyzeRequest(events=events))
+    counts = Counter(b.status for b in result.blocks)
+    assert result.stats.active_count == counts[BlockStatus.active] == 1
+    assert result.stats.leaked_count == counts[BlockStatus.leaked] == 2
+    assert result.stats.freed_count == counts[BlockStatus.freed] == 1
+    assert result.stats.double_free_count == counts[BlockStatus.double_free] == 0
+    assert result.stats.leaked_bytes == sum(
+        b.size for b in result.blocks if b.status is BlockStatus.leaked
+    )
@@ -0,0 +1,171 @@
+import json
+
+import orjson
+import pytest
+
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.models.schemas import (  # noqa: E402
+    MAX_BLOCK_SIZE,
+    MAX_SAFE_EVENTS,
+    AnalyzeRequest,
+)
+from app.routers import analysis  # noqa: E402
+from app.services.analyzer import analyze_events  # noqa: E402
+
+client = TestClient(app)
+
+
+def test_analyze_endpoint():
+    """The analyze endpoint should return the analysis as JSON."""
+    events = [
+        {"time": 0, "action": "alloc", "id": "a", "size": 64, "label": "a"},
+        {"time": 1, "action": "end"},
+    ]
+    response = client.post("/api/analyze", json={"events": events})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["stats"]["leaked_bytes"] == 64
+    assert body["blocks"] == [
+        {"id": "a", "label": "a", "size": 64, "status": "leaked"}
+    ]
+
+
+def test_analyze_endpoint_caches_results(monkeypatch):
+    """Resubmitting the same trace should be served from the cache."""
+    calls = []
+
+    def counting_analyze(request):
+        calls.append(request)
+        return analyze_events(request)
+
+    monkeypatch.setattr(analysis, "analyze_events", counting_analyze)
+    monkeypatch.setattr(analysis, "_cache", analysis._ResponseCache(2**20, 2**20))
+    events = [{"time": 0, "action": "alloc", "id": "a", "size": 8, "label": "a"}]
+
+    first = client.post("/api/analyze", json={"events": events})
+    second = client.post("/api/analyze", json={"events": events})
+    compressed = client.post(
+        "/api/analyze", json={"events": events, "compress_snapshots": True}
+    )
+
+    assert first.json() == second.json() == compressed.json()
+    assert len(calls) == 2
+
+
+def test_analyze_stream_endpoint():
+    """The stream endpoint should emit one line per snapshot, then the summary."""
+    events = [
+        {"time": 0, "action": "alloc", "id": "a", "size": 64, "label": "a"},
+        {"time": 1, "action": "free", "id": "a"},
+        {"time": 2, "action": "end"},
+    ]
+    response = client.post("/api/analyze/stream", json={"events": events})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["type"] for line in lines] == ["snapshot"] * 3 + ["summary"]
+    assert [line["heap_bytes"] for line in lines[:3]] == [64, 0, 0]
+    assert lines[-1]["verdict"] == "ALL CLEAR — NO LEAKS"
+    assert lines[-1]["stats"]["freed_count"] == 1
+
+
+@pytest.mark.parametrize("path", ["/api/analyze", "/api/analyze/stream"])
+def test_oversized_trace_rejected(monkeypatch, path):
+    """Traces above MAX_EVENTS should be rejected with 413."""
+    monkeypatch.setattr(analysis, "MAX_EVENTS", 2)
+    events = [{"time": t, "action": "end"} for t in range(3)]
+    response = client.post(path, json={"events": events})
+    assert response.status_code == 413
+
+
+def test_analyze_endpoint_encodes_maximum_sizes():
+    """Totals built from maximum-size blocks must encode without error."""
+    event = {"action": "alloc", "size": MAX_BLOCK_SIZE, "label": "x"}
+    events = [{**event, "time": t, "id": str(t)} for t in range(4)]
+    response = client.post("/api/analyze", json={"events": events})
+    assert response.status_code == 200
+    stats = response.json()["stats"]
+    assert stats["current_heap"] == stats["peak_mem"] == 4 * MAX_BLOCK_SIZE
+
+
+def test_event_limit_keeps_totals_in_int64():
+    """MAX_EVENTS maximum-size blocks must not exceed orjson's integer range."""
+    assert analysis.MAX_EVENTS <= MAX_SAFE_EVENTS
+    assert MAX_SAFE_EVENTS * MAX_BLOCK_SIZE < 2**63
+
+
+def test_analyze_endpoint_rejects_oversized_block():
+    """Sizes beyond MAX_BLOCK_SIZE should fail validation, not cache hashing."""
+    event = {"time": 0, "action": "alloc", "id": "a", "size": 2**64, "label": "a"}
+    response = client.post("/api/analyze", json={"events": [event]})
+    assert response.status_code == 422
+
+
+def test_response_cache_evicts_by_size():
+    """The cache should evict oldest bodies to stay within its byte budget."""
+    cache = analysis._ResponseCache(max_bytes=10, max_body_bytes=6)
+    cache.put(b"a", b"1234")
+    cache.put(b"b", b"1234")
+    assert cache.get(b"a") == b"1234"  # refreshes "a", leaving "b" oldest
+    cache.put(b"c", b"1234")
+    assert cache.get(b"b") is None
+    assert (cache.get(b"a"), cache.get(b"c")) == (b"1234", b"1234")
+    assert cache.size == 8
+
+    cache.put(b"d", b"1234567")
+    assert cache.get(b"d") is None
+    assert len(cache) == 2
+
+
+def test_large_responses_are_not_cached(monkeypatch):
+    """Bodies above the per-entry limit should bypass the cache."""
+    cache = analysis._ResponseCache(max_bytes=2**20, max_body_bytes=64)
+    monkeypatch.setattr(analysis, "_cache", cache)
+    events = [{"time": 0, "action": "alloc", "id": "a", "size": 8, "label": "a"}]
+    response = client.post("/api/analyze", json={"events": events})
+    assert response.status_code == 200
+    assert len(cache) == 0
+
+
+def test_analyze_stream_rejects_oversized_block():
+    """Invalid sizes should get a 422 before any streamed output."""
+    event = {"time": 0, "action": "alloc", "id": "a", "size": 2**64, "label": "a"}
+    response = client.post("/api/analyze/stream", json={"events": [event]})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize("count", [0, 1, analysis.STREAM_CHUNK_LINES + 1])
+def test_analyze_stream_always_ends_with_summary(count):
+    """Every stream, including an empty trace, should end with a summary line."""
+    event = {"action": "alloc", "size": MAX_BLOCK_SIZE, "label": "x"}
+    events = [{**event, "time": t, "id": str(t)} for t in range(count)]
+    response = client.post("/api/analyze/stream", json={"events": events})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(lines) == count + 1
+    assert lines[-1]["type"] == "summary"
+    assert lines[-1]["stats"]["current_heap"] == count * MAX_BLOCK_SIZE
+
+
+@pytest.mark.parametrize("time", [2**64, -(2**63) - 1])
+def test_analyze_endpoint_accepts_oversized_time(time):
+    """Event times outside 64 bits are valid and must not break the cache key."""
+    events = [{"time": time, "action": "end"}]
+    response = client.post("/api/analyze", json={"events": events})
+    assert response.status_code == 200
+    assert response.json()["stats"]["total_ops"] == 1
+
+
+def test_cache_admits_bodies_at_max_events():
+    """A full-size trace's response should fit under the per-entry limit."""
+    event = {"action": "alloc", "size": MAX_BLOCK_SIZE, "label": "x" * 32}
+    events = [{**event, "time": t, "id": f"block-{t:08d}"} for t in range(10_000)]
+    body = orjson.dumps(
+        analyze_events(AnalyzeRequest(events=events)).model_dump()
+    )
+    per_event = len(body) / len(events)
+    assert per_event * analysis.MAX_EVENTS <= analysis.CACHE_MAX_BODY_BYTES